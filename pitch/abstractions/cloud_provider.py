@@ -1,4 +1,5 @@
 from ..models import TiltStatus
+from ..rate_limiter import RateLimitedException
 from abc import ABC, abstractmethod
 
 class CloudProviderBase(ABC):
@@ -6,8 +7,20 @@ class CloudProviderBase(ABC):
     def start(self):
         pass
 
+    def stop(self):
+        pass
+
     def update(self, tilt_status: TiltStatus):
         pass
 
+    def update_batch(self, tilt_statuses: list):
+        for tilt_status in tilt_statuses:
+            try:
+                self.update(tilt_status)
+            except RateLimitedException:
+                print("Skipping update due to rate limiting for provider {} for color {}".format(self, tilt_status.color))
+            except Exception as e:
+                print(e)
+
     def enabled(self):
-        return False
\ No newline at end of file
+        return False
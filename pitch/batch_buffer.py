@@ -0,0 +1,45 @@
+import threading
+
+
+class BatchBuffer:
+    """Collects items into a batch, a new batch fills while the last one handed over is being drained"""
+
+    def __init__(self, batch_size=1):
+        self.batch_size = batch_size
+        self.buffer = list()
+        self.draining = False
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def append(self, item):
+        """Adds an item to the batch, returns the new length or 0 if the batch is full and the item was dropped"""
+        with self.lock:
+            if len(self.buffer) >= self.batch_size:
+                self.dropped += 1
+                return 0
+            self.buffer.append(item)
+            return len(self.buffer)
+
+    def swap(self):
+        """Hands over the batch to be drained, returns None if it is empty or the last batch is still draining"""
+        with self.lock:
+            if self.draining or not self.buffer:
+                return None
+            # The handed over list is never touched again, so it stays valid for as long as it is being read
+            buffer = self.buffer
+            self.buffer = list()
+            self.draining = True
+            return buffer
+
+    def take_dropped(self):
+        """Returns the number of items dropped since the last call and resets it"""
+        with self.lock:
+            dropped = self.dropped
+            self.dropped = 0
+            return dropped
+
+    def drained(self):
+        """Marks the batch handed over by swap as handled, returns the number of items waiting"""
+        with self.lock:
+            self.draining = False
+            return len(self.buffer)
@@ -5,9 +5,9 @@ import os
 class PitchConfig:
 
     def __init__(self, data: dict):
-        # Queue
-        self.queue_size = 3
-        self.queue_empty_sleep_seconds = 1
+        # Batching
+        self.batch_flush_seconds = 1
+        self.provider_timeout_seconds = 10
         # Broadcast Data ranges
         self.temp_range_min = 32
         self.temp_range_max = 212
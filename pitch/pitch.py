@@ -1,13 +1,11 @@
-import argparse
 import asyncio
+import copy
+import datetime
 import signal
-import threading
 import time
-import queue
 import logging
 import struct
 import uuid
-from types import SimpleNamespace
 from pyfiglet import Figlet
 from bleak import BleakScanner
 
@@ -15,6 +13,8 @@ from .models import TiltStatus
 from .providers import *
 from .configuration import PitchConfig
 from .rate_limiter import RateLimitedException
+from .batch_buffer import BatchBuffer
+from .provider_worker import ProviderWorker
 
 #############################################
 # Statics
@@ -33,6 +33,9 @@ uuid_to_colors = {
 
 colors_to_uuid = dict((v, k) for k, v in uuid_to_colors.items())
 
+# Same mapping keyed by the raw 16 byte UUID found in the iBeacon payload
+_uuid_bytes_to_color = {uuid.UUID(k).bytes: v for k, v in uuid_to_colors.items()}
+
 # Load config
 config = PitchConfig.load()
 
@@ -49,12 +52,28 @@ normal_providers = [
     AzureIoTHubCloudProvider(config)
 ]
 
-# Queue for holding incoming scans
-pitch_q = queue.Queue(maxsize=config.queue_size)
+# Worker thread for each enabled provider, created once the enabled providers are known
+_workers = dict()
+
+# Scans waiting to be sent to providers, flushed once a batch fills or batch_flush_seconds pass
+_batch_buffer = BatchBuffer(max(1, config.influxdb_batch_size))
+
+# Latest update submitted for each provider, a provider is skipped while its last update is still running
+_provider_updates = dict()
+
+# Keeps running flushes referenced until they finish
+_flush_tasks = set()
+
+# Dropped scans are reported at most this often
+DROPPED_REPORT_SECONDS = 10
 
 # Apple Manufacturer ID for iBeacons
 APPLE_MANUFACTURER_ID = 0x004C
 
+# iBeacon type/length header and the payload after it: UUID, Major, Minor (TX Power is not used)
+_IBEACON_HEADER = b"\x02\x15"
+_IBEACON = struct.Struct(">16sHH")
+
 class IBeaconParser:
     @staticmethod
     def parse(manufacturer_data):
@@ -65,20 +84,11 @@ class IBeaconParser:
         # Bytes 20-21: Minor
         # Byte 22: TX Power
         
-        if len(manufacturer_data) < 23:
-            return None
-            
-        if manufacturer_data[0] != 0x02 or manufacturer_data[1] != 0x15:
+        if len(manufacturer_data) < 23 or not manufacturer_data.startswith(_IBEACON_HEADER):
             return None
 
-        uuid_bytes, major, minor, tx_power = struct.unpack(">16sHHb", manufacturer_data[2:23])
-        
-        return SimpleNamespace(
-            uuid=str(uuid.UUID(bytes=uuid_bytes)),
-            major=major,
-            minor=minor,
-            tx_power=tx_power
-        )
+        # (uuid_bytes, major, minor)
+        return _IBEACON.unpack_from(manufacturer_data, 2)
 
 def pitch_main(providers, timeout_seconds: int, simulate_beacons: bool, console_log: bool = True):
     if providers is None:
@@ -102,131 +112,212 @@ def pitch_main(providers, timeout_seconds: int, simulate_beacons: bool, console_
                 provider__start_message = ''
             print("...started: {} {}".format(provider, provider__start_message))
 
+    # One worker per provider so a slow provider does not hold up the others
+    for provider in enabled_providers:
+        _workers[provider] = ProviderWorker("provider ({})".format(provider))
+
     # Determine mode
     if simulate_beacons:
-        # Simulation is synchronous, can run in main thread or separate thread
-        threading.Thread(name='background', target=_start_beacon_simulation, daemon=True).start()
-        _run_queue_consumer(enabled_providers, console_log, timeout_seconds)
+        listener = _start_beacon_simulation(enabled_providers, console_log, timeout_seconds)
     else:
-        consumer_thread = threading.Thread(
-            target=_run_queue_consumer, 
-            args=(enabled_providers, console_log, timeout_seconds),
-            daemon=True
-        )
-        consumer_thread.start()
-        
-        try:
-            asyncio.run(_run_bleak_scanner(timeout_seconds))
-        except KeyboardInterrupt:
-            print("\n...stopped: Tilt Scanner (KeyboardInterrupt)")
+        listener = _run_bleak_scanner(enabled_providers, console_log, timeout_seconds)
+
+    try:
+        asyncio.run(_listen(listener, enabled_providers, console_log))
+    except KeyboardInterrupt:
+        print("\n...stopped: Tilt Scanner (KeyboardInterrupt)")
+    finally:
+        for provider in enabled_providers:
+            _workers.pop(provider).shutdown()
+            try:
+                provider.stop()
+            except Exception as e:
+                print(e)
 
-async def _run_bleak_scanner(timeout_seconds):
+async def _listen(listener, enabled_providers, console_log):
+    try:
+        await listener
+    finally:
+        await _flush_remaining(enabled_providers, console_log)
+
+async def _run_bleak_scanner(enabled_providers, console_log, timeout_seconds):
     print("...started: Tilt scanner")
     
-    def bleak_callback(device, advertising_data):
-        if APPLE_MANUFACTURER_ID in advertising_data.manufacturer_data:
-            raw_data = advertising_data.manufacturer_data[APPLE_MANUFACTURER_ID]
-            
-            packet = IBeaconParser.parse(raw_data)
-            
-            if packet:
-                _beacon_callback(device.address, advertising_data.rssi, packet, advertising_data.manufacturer_data)
+    # Called for every advertisement, hot globals are bound as defaults
+    def bleak_callback(device, advertising_data,
+                       _APPLE=APPLE_MANUFACTURER_ID, _parse=IBeaconParser.parse, _cb=_beacon_callback,
+                       _dispatch=_dispatch_tilt_status):
+        raw_data = advertising_data.manufacturer_data.get(_APPLE)
+        if raw_data is None:
+            return
+
+        packet = _parse(raw_data)
+
+        if packet:
+            uuid_bytes, major, minor = packet
+            tilt_status = _cb(device.address, advertising_data.rssi, uuid_bytes, major, minor, advertising_data.manufacturer_data)
+            if tilt_status:
+                _dispatch(enabled_providers, tilt_status, console_log)
 
     scanner = BleakScanner(bleak_callback)
     
     await scanner.start()
     print("Ready! Listening for beacons")
     
-    # Keep the loop alive until timeout or user kill
-    # If timeout_seconds is 0, we loop forever
-    start_time = time.time()
+    # Keep the loop alive until timeout, termination signal or user kill
+    # If timeout_seconds is 0, we wait forever
+    stop_event = asyncio.Event()
+    restore_sigterm = None
     
     try:
-        while True:
-            await asyncio.sleep(1.0)
-            if timeout_seconds > 0 and (time.time() - start_time > timeout_seconds):
-                break
-    except asyncio.CancelledError:
+        restore_sigterm = _stop_on_sigterm(stop_event)
+        await asyncio.wait_for(stop_event.wait(), timeout=timeout_seconds if timeout_seconds > 0 else None)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
         pass
     finally:
+        if restore_sigterm:
+            restore_sigterm()
         await scanner.stop()
         print("...stopped: Scanner")
 
-def _run_queue_consumer(enabled_providers, console_log, timeout_seconds):
-    start_time = time.time()
-    while True:
-        try:
-            _handle_pitch_queue(enabled_providers, console_log)
-            
-            # Check timeout (if applicable) to kill the thread
-            if timeout_seconds > 0 and (time.time() - start_time > timeout_seconds):
-                return
-                
-        except Exception as e:
-            print(f"Error in consumer loop: {e}")
-            time.sleep(1)
-
-def _start_beacon_simulation():
+async def _start_beacon_simulation(enabled_providers, console_log, timeout_seconds):
     print("...started: Tilt Beacon Simulator")
-    fake_packet = argparse.Namespace(**{
-        'uuid': colors_to_uuid['simulated'],
-        'major': 70,
-        'minor': 1035
-    })
-    while True:
-        _beacon_callback(None, None, fake_packet, dict())
-        time.sleep(0.25)
+    # Every simulated broadcast is identical apart from its timestamp
+    simulated_status = TiltStatus('simulated', 70, _get_decimal_gravity(1035), config)
+    deadline = time.monotonic() + timeout_seconds if timeout_seconds > 0 else None
+    stop_event = asyncio.Event()
+    restore_sigterm = None
 
+    try:
+        restore_sigterm = _stop_on_sigterm(stop_event)
+        while not stop_event.is_set():
+            tilt_status = copy.copy(simulated_status)
+            tilt_status.timestamp = datetime.datetime.now()
+            _dispatch_tilt_status(enabled_providers, tilt_status, console_log)
+            await asyncio.sleep(0.25)
+            if deadline and time.monotonic() > deadline:
+                break
+    finally:
+        if restore_sigterm:
+            restore_sigterm()
+        print("...stopped: Tilt Beacon Simulator")
 
-def _beacon_callback(bt_addr, rssi, packet, additional_info):
-    if pitch_q.full():
-        return
 
-    uuid_val = packet.uuid
-    color = uuid_to_colors.get(uuid_val)
-    
-    if color:
-        tilt_status = TiltStatus(color, packet.major, _get_decimal_gravity(packet.minor), config)
-        if not tilt_status.temp_valid:
-            print("Ignoring broadcast due to invalid temperature: {}F".format(tilt_status.temp_fahrenheit))
-        elif not tilt_status.gravity_valid:
-            print("Ignoring broadcast due to invalid gravity: " + str(tilt_status.gravity))
-        else:
-            pitch_q.put_nowait(tilt_status)
-
-
-def _handle_pitch_queue(enabled_providers: list, console_log: bool):
-    if config.queue_empty_sleep_seconds > 0 and pitch_q.empty():
-        time.sleep(config.queue_empty_sleep_seconds)
+def _stop_on_sigterm(stop_event: asyncio.Event):
+    # Sets stop_event on SIGTERM, returns a function which restores the previous handling
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGTERM, stop_event.set)
+        return lambda: loop.remove_signal_handler(signal.SIGTERM)
+    except NotImplementedError:
+        # Event loops on Windows do not support signal handlers
+        previous = signal.signal(signal.SIGTERM, lambda signum, frame: loop.call_soon_threadsafe(stop_event.set))
+        return lambda: signal.signal(signal.SIGTERM, previous)
+
+
+def _get_decimal_gravity(gravity):
+    return gravity * .001
+
+
+def _beacon_callback(bt_addr, rssi, uuid_bytes, major, minor, additional_info,
+                     _map=_uuid_bytes_to_color, _TS=TiltStatus, _cfg=config, _gd=_get_decimal_gravity):
+    # Most iBeacons nearby are not Tilts, skip them before doing any other work
+    color = _map.get(uuid_bytes)
+    if color is None:
+        return None
+
+    tilt_status = _TS(color, major, _gd(minor), _cfg)
+    if not tilt_status.temp_valid:
+        print("Ignoring broadcast due to invalid temperature: {}F".format(tilt_status.temp_fahrenheit))
+    elif not tilt_status.gravity_valid:
+        print("Ignoring broadcast due to invalid gravity: " + str(tilt_status.gravity))
+    else:
+        return tilt_status
+
+
+def _dispatch_tilt_status(enabled_providers: list, tilt_status: TiltStatus, console_log: bool):
+    # Must be called from the event loop
+    waiting = _batch_buffer.append(tilt_status)
+    if not waiting:
+        # First drop since the last report, schedule the next one
+        if _batch_buffer.dropped == 1:
+            asyncio.get_running_loop().call_later(DROPPED_REPORT_SECONDS, _report_dropped_scans)
+    elif waiting >= _batch_buffer.batch_size:
+        _flush_batch(enabled_providers, console_log)
+    elif waiting == 1:
+        asyncio.get_running_loop().call_later(config.batch_flush_seconds, _flush_batch, enabled_providers, console_log)
+
+
+def _flush_batch(enabled_providers: list, console_log: bool):
+    batch = _batch_buffer.swap()
+    if batch is None:
         return
 
-    if pitch_q.full():
-        length = pitch_q.qsize()
-        print("Queue is full ({} events), scans will be ignored".format(length))
+    task = asyncio.get_running_loop().create_task(_update_providers(enabled_providers, batch, console_log))
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
+
 
+async def _update_providers(enabled_providers: list, batch: list, console_log: bool):
+    # Providers are updated concurrently on their workers. Each batch is its own list, so a provider
+    # which runs past the timeout can keep reading it while the next batch is handled without it.
     try:
-        tilt_status = pitch_q.get(timeout=1) 
-    except queue.Empty:
-        return
+        updates = dict()
+        for provider in enabled_providers:
+            previous = _provider_updates.get(provider)
+            if previous is not None and not previous.done():
+                print("Skipping update for provider {}, it is still handling an earlier batch".format(provider))
+                continue
+            update = _workers[provider].submit(_update_provider, provider, batch, console_log)
+            _provider_updates[provider] = update
+            updates[asyncio.wrap_future(update)] = provider
 
-    for provider in enabled_providers:
-        try:
-            start = time.time()
-            provider.update(tilt_status)
-            time_spent = time.time() - start
-            if console_log:
-                print("Updated provider {} for color {} took {:.3f} seconds".format(provider, tilt_status.color, time_spent))
-        except RateLimitedException:
-            print("Skipping update due to rate limiting for provider {} for color {}".format(provider, tilt_status.color))
-        except Exception as e:
-            print(e)
-            
-    if console_log:
-        print(tilt_status.json())
+        if updates:
+            timeout = config.provider_timeout_seconds if config.provider_timeout_seconds > 0 else None
+            done, pending = await asyncio.wait(updates, timeout=timeout)
+            for update in pending:
+                update.cancel()
+                print("Provider {} did not finish within {} seconds, continuing without it".format(updates[update], timeout))
+            for update in done:
+                error = update.exception()
+                if isinstance(error, RateLimitedException):
+                    print("Skipping update due to rate limiting for provider {}".format(updates[update]))
+                elif error is not None:
+                    print(error)
 
+        if console_log:
+            for tilt_status in batch:
+                print(tilt_status.json())
+    finally:
+        # Scans which arrived while this batch was being handled have already waited, send them right away
+        if _batch_buffer.drained():
+            _flush_batch(enabled_providers, console_log)
+
+
+async def _flush_remaining(enabled_providers: list, console_log: bool):
+    # Sends scans still waiting in the buffer and waits until every batch has been handled
+    while True:
+        _flush_batch(enabled_providers, console_log)
+        pending = [task for task in _flush_tasks if not task.done()]
+        if not pending:
+            return
+        await asyncio.wait(pending)
 
-def _get_decimal_gravity(gravity):
-    return gravity * .001
+
+def _report_dropped_scans():
+    print("Batch was full ({} events), {} scans were ignored in the last {} seconds"
+          .format(_batch_buffer.batch_size, _batch_buffer.take_dropped(), DROPPED_REPORT_SECONDS))
+
+
+def _update_provider(provider, batch: list, console_log: bool):
+    if not console_log:
+        provider.update_batch(batch)
+        return
+
+    start = time.time()
+    provider.update_batch(batch)
+    time_spent = time.time() - start
+    print("Updated provider {} with {} events took {:.3f} seconds".format(provider, len(batch), time_spent))
 
 
 def _get_webhook_providers(config: PitchConfig):
@@ -239,6 +330,3 @@ def _get_webhook_providers(config: PitchConfig):
 def _start_message():
     f = Figlet(font='slant')
     print(f.renderText('Pitch'))
-
-def _trigger_graceful_termination(signalNumber, frame):
-    raise Exception("Termination signal received")
@@ -0,0 +1,42 @@
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class ProviderWorker:
+    """Long-lived daemon thread which runs one provider's updates, so a hung provider cannot keep Pitch from exiting"""
+
+    def __init__(self, name):
+        self.tasks = queue.Queue()
+        self.thread = threading.Thread(name=name, target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args):
+        """Queues fn(*args) to run on the worker thread, returns a Future for its result"""
+        future = Future()
+        self.tasks.put((future, fn, args))
+        return future
+
+    def shutdown(self):
+        """Cancels queued calls and lets the thread exit once the running call, if any, returns"""
+        while True:
+            try:
+                task = self.tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is not None:
+                task[0].cancel()
+        self.tasks.put(None)
+
+    def _run(self):
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                return
+            future, fn, args = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
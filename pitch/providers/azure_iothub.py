@@ -13,6 +13,7 @@ class AzureIoTHubCloudProvider(CloudProviderBase):
     def __init__(self, config: PitchConfig):
         self.config = config
         self.str_name = "Azure IoT Hub ({})".format(config.azure_iot_hub_connectionstring)
+        self.is_enabled = bool(config.azure_iot_hub_connectionstring)
         self.rate_limiter = DeviceRateLimiter(rate=config.azure_iot_hub_limit_rate, period=config.azure_iot_hub_limit_period)
 
     def __str__(self):
@@ -35,5 +36,4 @@ class AzureIoTHubCloudProvider(CloudProviderBase):
         asyncio.run(self.send(tilt_status))
 
     def enabled(self):
-        enabled = True if self.config.azure_iot_hub_connectionstring else False
-        return enabled
+        return self.is_enabled
@@ -27,6 +27,7 @@ class BrewersFriendCustomStreamCloudProvider(CloudProviderBase):
         self.api_key = config.brewersfriend_api_key
         self.url = "https://log.brewersfriend.com/stream/{}".format(config.brewersfriend_api_key)
         self.str_name = "Brewer's Friend ({})".format(self.url)
+        self.is_enabled = bool(self.api_key)
         self.rate_limiter = DeviceRateLimiter(rate=1, period=(60 * 15))  # 15 minutes
         self.headers = {'Content-type': 'application/json', 'Accept': 'text/plain'}
         self.temp_unit = BrewersFriendCustomStreamCloudProvider._get_temp_unit(config)
@@ -44,7 +45,7 @@ class BrewersFriendCustomStreamCloudProvider(CloudProviderBase):
         result.raise_for_status()
 
     def enabled(self):
-        return True if self.api_key else False
+        return self.is_enabled
 
     def _get_payload(self, tilt_status: TiltStatus):
         return {
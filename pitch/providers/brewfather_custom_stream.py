@@ -29,6 +29,7 @@ class BrewfatherCustomStreamCloudProvider(CloudProviderBase):
         self.url = config.brewfather_custom_stream_url
         self.temp_unit = BrewfatherCustomStreamCloudProvider._get_temp_unit(config)
         self.str_name = "Brewfather ({})".format(self.url)
+        self.is_enabled = bool(self.url)
         self.rate_limiter = DeviceRateLimiter(rate=1, period=(60 * 15))  # 15 minutes
 
     def __str__(self):
@@ -45,7 +46,7 @@ class BrewfatherCustomStreamCloudProvider(CloudProviderBase):
         result.raise_for_status()
 
     def enabled(self):
-        return True if self.url else False
+        return self.is_enabled
 
     def _get_temp_value(self, tilt_status: TiltStatus):
         if self.temp_unit == "F":
@@ -10,6 +10,7 @@ class FileCloudProvider(CloudProviderBase):
     def __init__(self, config: PitchConfig):
         self.config = config
         self.str_name = "File ({})".format(config.log_file_path)
+        self.is_enabled = bool(config.log_file_path)
         self.logger = logging.getLogger(self.str_name)
 
     def __str__(self):
@@ -24,4 +25,4 @@ class FileCloudProvider(CloudProviderBase):
         self.logger.warning(tilt_status.json())
 
     def enabled(self):
-        return (self.config.log_file_path)
\ No newline at end of file
+        return self.is_enabled
\ No newline at end of file
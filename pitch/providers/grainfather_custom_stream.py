@@ -19,6 +19,7 @@ class GrainfatherCustomStreamCloudProvider(CloudProviderBase):
         self.color_urls = GrainfatherCustomStreamCloudProvider._normalize_color_keys(config.grainfather_custom_stream_urls)
         self.temp_unit = GrainfatherCustomStreamCloudProvider._get_temp_unit(config)
         self.str_name = "Grainfather Custom URL"
+        self.is_enabled = bool(self.color_urls)
         self.rate_limiter = DeviceRateLimiter(rate=1, period=(60 * 15))  # 15 minutes
 
     def __str__(self):
@@ -39,7 +40,7 @@ class GrainfatherCustomStreamCloudProvider(CloudProviderBase):
         result.raise_for_status()
 
     def enabled(self):
-        return True if self.color_urls else False
+        return self.is_enabled
     
     def _get_payload(self, tilt_status: TiltStatus):
         return {
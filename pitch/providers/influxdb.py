@@ -9,6 +9,7 @@ class InfluxDbCloudProvider(CloudProviderBase):
     def __init__(self, config: PitchConfig):
         self.config = config
         self.str_name = "InfluxDb ({}:{})".format(config.influxdb_hostname,config.influxdb_port)
+        self.is_enabled = bool(config.influxdb_hostname)
         self.batch = list()
 
     def __str__(self):
@@ -31,7 +32,7 @@ class InfluxDbCloudProvider(CloudProviderBase):
         self.batch.clear()
 
     def enabled(self):
-        return (self.config.influxdb_hostname)
+        return self.is_enabled
 
     def get_point(self, tilt_status: TiltStatus):
         return {
@@ -2,7 +2,33 @@ from ..models import TiltStatus
 from ..abstractions import CloudProviderBase
 from ..configuration import PitchConfig
 from influxdb_client import InfluxDBClient
-from influxdb_client.client.write_api import SYNCHRONOUS, WritePrecision
+from influxdb_client.client.write_api import WriteOptions, WritePrecision
+
+# Points are written as line protocol, timestamps are in milliseconds to match WritePrecision.MS
+_FIELDS_TEMPLATE = ("temp_fahrenheit={temp_fahrenheit},temp_celsius={temp_celsius},gravity={gravity},"
+                    "degrees_plato={degrees_plato},alcohol_by_volume={alcohol_by_volume},"
+                    "apparent_attenuation={apparent_attenuation} {timestamp}")
+
+
+# Ints are written with the i suffix like the client's Point serializer did, so existing fields keep their type
+def _format_field(value):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return "{}i".format(value)
+    return str(value)
+
+
+# Tag values must have commas, equals signs, spaces and line breaks escaped
+_TAG_ESCAPES = str.maketrans({',': '\\,', '=': '\\=', ' ': '\\ ', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+
+# Empty tags are left out like the client's Point serializer did, they are not valid line protocol
+def _format_tags(**tags):
+    line = "tilt"
+    for key, value in tags.items():
+        value = "" if value is None else str(value).translate(_TAG_ESCAPES)
+        if value:
+            line += ",{}={}".format(key, value)
+    return line + " "
 
 
 class InfluxDb2CloudProvider(CloudProviderBase):
@@ -10,7 +36,9 @@ class InfluxDb2CloudProvider(CloudProviderBase):
     def __init__(self, config: PitchConfig):
         self.config = config
         self.str_name = "InfluxDb2 ({})".format(config.influxdb2_url)
-        self.batch = list()
+        self.is_enabled = bool(config.influxdb2_url)
+        # Escaped measurement and tags, keyed by (color, name)
+        self.tag_cache = dict()
 
     def __str__(self):
         return self.str_name
@@ -21,56 +49,41 @@ class InfluxDb2CloudProvider(CloudProviderBase):
             token=self.config.influxdb2_token,
             org=self.config.influxdb2_org,
             timeout=self.config.influxdb_timeout_seconds*1000)
-        self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self.write_api = self.client.write_api(write_options=WriteOptions(
+            batch_size=self.config.influxdb_batch_size,
+            flush_interval=10_000,
+            retry_interval=getattr(self.config, 'influxdb2_retry_backoff_seconds', 2) * 1000,
+            max_retries=getattr(self.config, 'influxdb2_retries', 3)))
+
+    def stop(self):
+        # Flushes points still batched in the write api before closing
+        self.write_api.close()
+        self.client.close()
 
     def update(self, tilt_status: TiltStatus):
-        self.batch.append(self.get_point(tilt_status))
-        if len(self.batch) < self.config.influxdb_batch_size:
-            print("Batch size not met yet, skipping.")
-            return
-        print("Sending data to influxdb2")
-        max_retries = getattr(self.config, 'influxdb2_retries', 3)
-        backoff_seconds = getattr(self.config, 'influxdb2_retry_backoff_seconds', 2)
-
-        for attempt in range(1, max_retries + 1):
-            try:
-                self.write_api.write(
-                    bucket=self.config.influxdb2_bucket,
-                    record=self.batch,
-                    write_precision=WritePrecision.MS)
-                print(f"InfluxDB write succeeded on attempt {attempt}.")
-                self.batch.clear()
-                break
-            except Exception as e:
-                print(f"InfluxDB write attempt {attempt} failed: {e}")
-                if attempt < max_retries:
-                    sleep_time = backoff_seconds * (2 ** (attempt - 1))
-                    print(f"Retrying in {sleep_time} seconds...")
-                    try:
-                        import time
-                        time.sleep(sleep_time)
-                    except KeyboardInterrupt:
-                        print("Retry sleep interrupted by user.")
-                        break
-                else:
-                    print("All InfluxDB write attempts failed — keeping batch for later retry.")
+        self.update_batch([tilt_status])
+
+    def update_batch(self, tilt_statuses: list):
+        # The write api batches, retries and backs off in the background
+        self.write_api.write(
+            bucket=self.config.influxdb2_bucket,
+            record=[self.get_point(tilt_status) for tilt_status in tilt_statuses],
+            write_precision=WritePrecision.MS)
 
     def enabled(self):
-        return (self.config.influxdb2_url)
+        return self.is_enabled
 
     def get_point(self, tilt_status: TiltStatus):
-        return {
-            "measurement": "tilt",
-            "tags": {
-                "color": tilt_status.color,
-                "name": tilt_status.name
-            },
-            "fields": {
-                "temp_fahrenheit": tilt_status.temp_fahrenheit,
-                "temp_celsius": tilt_status.temp_celsius,
-                "gravity": tilt_status.gravity,
-                "degrees_plato": tilt_status.degrees_plato,
-                "alcohol_by_volume": tilt_status.alcohol_by_volume,
-                "apparent_attenuation": tilt_status.apparent_attenuation
-            }
-        }
+        key = (tilt_status.color, tilt_status.name)
+        tags = self.tag_cache.get(key)
+        if tags is None:
+            tags = _format_tags(color=tilt_status.color, name=tilt_status.name)
+            self.tag_cache[key] = tags
+        return tags + _FIELDS_TEMPLATE.format(
+            temp_fahrenheit=_format_field(tilt_status.temp_fahrenheit),
+            temp_celsius=_format_field(tilt_status.temp_celsius),
+            gravity=_format_field(tilt_status.gravity),
+            degrees_plato=_format_field(tilt_status.degrees_plato),
+            alcohol_by_volume=_format_field(tilt_status.alcohol_by_volume),
+            apparent_attenuation=_format_field(tilt_status.apparent_attenuation),
+            timestamp=int(tilt_status.timestamp.timestamp() * 1000))
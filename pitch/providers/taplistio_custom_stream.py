@@ -10,6 +10,7 @@ class TaplistIOCloudProvider(CloudProviderBase):
     def __init__(self, config: PitchConfig):
         self.url = config.taplistio_url
         self.str_name = "Taplist.io ({})".format(self.url)
+        self.is_enabled = bool(self.url)
         self.rate_limiter = DeviceRateLimiter(rate=1, period=(60 * 15))  # 15 minutes
 
     def __str__(self):
@@ -29,7 +30,7 @@ class TaplistIOCloudProvider(CloudProviderBase):
         result.raise_for_status()
 
     def enabled(self):
-        return True if self.url else False
+        return self.is_enabled
 
     def _get_payload(self, tilt_status: TiltStatus):
         return {
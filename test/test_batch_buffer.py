@@ -0,0 +1,57 @@
+import unittest
+from pitch.batch_buffer import BatchBuffer
+
+class BatchBufferTests(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = BatchBuffer(batch_size=2)
+
+    def test_append_returns_length(self):
+        self.assertEqual(self.buffer.append("a"), 1)
+        self.assertEqual(self.buffer.append("b"), 2)
+
+    def test_append_drops_when_full(self):
+        self.buffer.append("a")
+        self.buffer.append("b")
+        self.assertEqual(self.buffer.append("c"), 0, msg="Item was added to a full buffer")
+        self.assertEqual(self.buffer.take_dropped(), 1)
+        self.assertEqual(self.buffer.take_dropped(), 0, msg="Dropped count was not reset")
+
+    def test_swap_empty(self):
+        self.assertIsNone(self.buffer.swap(), msg="Empty buffer was handed over")
+
+    def test_swap_hands_over_items(self):
+        self.buffer.append("a")
+        self.assertEqual(self.buffer.swap(), ["a"])
+        self.assertEqual(self.buffer.append("b"), 1, msg="New items did not go to a new batch")
+
+    def test_swap_while_draining(self):
+        self.buffer.append("a")
+        self.buffer.swap()
+        self.buffer.append("b")
+        self.assertIsNone(self.buffer.swap(), msg="Buffer was handed over while the last one was draining")
+
+    def test_drained(self):
+        self.buffer.append("a")
+        self.buffer.swap()
+        self.buffer.append("b")
+        self.assertEqual(self.buffer.drained(), 1, msg="Waiting items were not counted")
+        self.assertEqual(self.buffer.swap(), ["b"])
+
+    def test_drained_keeps_handed_over_items(self):
+        self.buffer.append("a")
+        batch = self.buffer.swap()
+        self.buffer.append("b")
+        self.buffer.drained()
+        self.assertEqual(batch, ["a"], msg="Handed over batch was changed")
+
+    def test_drops_while_draining(self):
+        self.buffer.append("a")
+        self.buffer.swap()
+        self.buffer.append("b")
+        self.buffer.append("c")
+        self.assertEqual(self.buffer.append("d"), 0, msg="Item was added while both batches were full")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import datetime
+import unittest
+from pitch.configuration import PitchConfig
+from pitch.models import TiltStatus
+from pitch.providers import InfluxDb2CloudProvider
+
+class InfluxDb2Tests(unittest.TestCase):
+
+    def setUp(self):
+        self.config = PitchConfig({})
+
+    def get_point(self, tilt_status):
+        return InfluxDb2CloudProvider(self.config).get_point(tilt_status)
+
+    def test_int_fields(self):
+        point = self.get_point(TiltStatus("purple", 70, 1.035, self.config))
+        self.assertIn("temp_fahrenheit=70i,", point, msg="Int field is missing the i suffix")
+        self.assertIn("alcohol_by_volume=0i,", point, msg="Int field is missing the i suffix")
+
+    def test_float_fields(self):
+        # Tilt Pro readings are divided by 10, so the temperature is a float
+        point = self.get_point(TiltStatus("purple", 700, 10.35, self.config))
+        self.assertIn("temp_fahrenheit=70.0,", point, msg="Float field was not written as a float")
+        self.assertIn("gravity=1.035,", point, msg="Float field was not written as a float")
+
+    def test_tag_escaping(self):
+        self.config.update({"purple_name": "Pale Ale, v=2\n"})
+        point = self.get_point(TiltStatus("purple", 70, 1.035, self.config))
+        self.assertTrue(point.startswith("tilt,color=purple,name=Pale\\ Ale\\,\\ v\\=2\\n "), msg=point)
+
+    def test_non_string_name(self):
+        self.config.update({"purple_name": 5})
+        point = self.get_point(TiltStatus("purple", 70, 1.035, self.config))
+        self.assertTrue(point.startswith("tilt,color=purple,name=5 "), msg=point)
+
+    def test_empty_name(self):
+        self.config.update({"purple_name": ""})
+        point = self.get_point(TiltStatus("purple", 70, 1.035, self.config))
+        self.assertTrue(point.startswith("tilt,color=purple temp_fahrenheit="), msg="Empty tag was not left out")
+
+    def test_timestamp_milliseconds(self):
+        tilt_status = TiltStatus("purple", 70, 1.035, self.config)
+        tilt_status.timestamp = datetime.datetime.fromtimestamp(1700000000.123)
+        point = self.get_point(tilt_status)
+        self.assertTrue(point.endswith(" 1700000000123"), msg=point)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import threading
+import unittest
+from pitch.provider_worker import ProviderWorker
+
+class ProviderWorkerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.worker = ProviderWorker("test")
+
+    def tearDown(self):
+        self.worker.shutdown()
+
+    def test_daemon_thread(self):
+        self.assertTrue(self.worker.thread.daemon, msg="Worker thread would keep Pitch from exiting")
+
+    def test_result(self):
+        future = self.worker.submit(lambda a, b: a + b, 1, 2)
+        self.assertEqual(future.result(timeout=1), 3)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError("failed")
+        future = self.worker.submit(fail)
+        self.assertIsInstance(future.exception(timeout=1), ValueError)
+
+    def test_shutdown_cancels_queued(self):
+        started = threading.Event()
+        release = threading.Event()
+        running = self.worker.submit(lambda: started.set() or release.wait())
+        started.wait(timeout=1)
+        queued = self.worker.submit(lambda: None)
+        self.worker.shutdown()
+        release.set()
+        self.assertTrue(queued.cancelled(), msg="Queued call was not cancelled")
+        self.assertTrue(running.result(timeout=1), msg="Running call did not finish")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,6 +22,11 @@ class TiltStatusTests(unittest.TestCase):
     def test_gravity_high(self):
         tilt_status = TiltStatus("purple", 70, self.config.gravity_range_max + 0.001, self.config)
         self.assertFalse(tilt_status.gravity_valid, msg="Gravity is less than max")
+
+    def test_in_range(self):
+        tilt_status = TiltStatus("purple", 70, 1.050, self.config)
+        self.assertTrue(tilt_status.temp_valid, msg="Temp is out of range")
+        self.assertTrue(tilt_status.gravity_valid, msg="Gravity is out of range")
         
 
 if __name__ == '__main__':